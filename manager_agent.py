@@ -1,19 +1,194 @@
 import os
+import json
+import re
+import math
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
 import google.generativeai as genai
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
 from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError, ExecutionTimeout
+from bson.errors import InvalidDocument
 
 # Load variables from .env file
 load_dotenv()
 
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)s: %(message)s"
+)
+
 # Configuration using environment variables (No hardcoded keys)
 API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=API_KEY)
 
+# MongoDB Setup (same defaults as api.py)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+mongo_client = MongoClient(MONGO_URI)
+db = mongo_client[os.getenv("MONGO_DB", "company_db")]
+
+# ------------------------------------------------------------
+# Query execution guardrails
+# ------------------------------------------------------------
+# The filter is written by the LLM, so only plain comparison / logical
+# operators are accepted. Anything that runs server-side code ($where,
+# $function, $accumulator) or pulls in other collections is rejected.
+ALLOWED_OPERATORS = {
+    "$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin",
+    "$and", "$or", "$nor", "$not", "$exists", "$regex", "$options",
+    "$all", "$size", "$elemMatch",
+}
+# Only these collections are exposed to the agent
+ALLOWED_COLLECTIONS = set(os.getenv("AGENT_ALLOWED_COLLECTIONS", "users,logs").split(","))
+DEFAULT_PROJECTION = {"_id": 0}
+QUERY_LIMIT = int(os.getenv("AGENT_QUERY_LIMIT", "50"))
+MAX_TIME_MS = int(os.getenv("AGENT_QUERY_MAX_TIME_MS", "2000"))
+# Collections above this size must be served by an index (no COLLSCAN)
+LARGE_COLLECTION_THRESHOLD = int(os.getenv("AGENT_LARGE_COLLECTION_DOCS", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("AGENT_QUERY_CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("AGENT_QUERY_CACHE_SIZE", "128"))
+
+# LRU of (collection, normalized filter) -> (expires_at, results)
+_query_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+class QueryRejected(ValueError):
+    """Raised when a generated filter fails the guardrails."""
+
+
+def to_plain(value):
+    """
+    Recursively convert tool arguments to plain dicts/lists. With automatic
+    function calling Gemini passes proto MapComposite/RepeatedComposite
+    objects, which are neither dict nor list and which bson cannot encode.
+    """
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return [to_plain(item) for item in value]
+    return value
+
+
+def validate_filter(query_parameters, depth=0):
+    """Recursively check that a filter only uses whitelisted operators."""
+    if depth > 10:
+        raise QueryRejected("Filter is nested too deeply.")
+
+    if isinstance(query_parameters, dict):
+        for key, value in query_parameters.items():
+            if not isinstance(key, str):
+                raise QueryRejected(f"Field names must be strings, got {key!r}")
+            if key.startswith("$") and key not in ALLOWED_OPERATORS:
+                raise QueryRejected(f"Operator not allowed: {key}")
+            validate_filter(value, depth + 1)
+    elif isinstance(query_parameters, list):
+        for item in query_parameters:
+            validate_filter(item, depth + 1)
+
+
+def normalize_filter(collection_name, query_parameters):
+    """
+    Build a stable cache key; dict ordering from the LLM is not guaranteed.
+    Expects a plain filter (see to_plain); anything that is not JSON
+    serializable raises TypeError instead of being keyed by its repr.
+    """
+    return (collection_name, json.dumps(query_parameters, sort_keys=True))
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() winning plan tree."""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def uses_collection_scan(collection_name, query_parameters):
+    """
+    Report whether the winning plan is a COLLSCAN. Uses queryPlanner
+    verbosity so the query is only planned, never executed.
+    """
+    explanation = db.command(
+        "explain",
+        {"find": collection_name, "filter": query_parameters, "limit": QUERY_LIMIT},
+        verbosity="queryPlanner",
+        maxTimeMS=MAX_TIME_MS,
+    )
+    winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+    return "COLLSCAN" in _plan_stages(winning_plan)
+
+
+def run_query(collection_name, query_parameters):
+    """
+    Executes a validated filter against MongoDB with a projection, a hard
+    limit and a server-side time budget. Results are cached for
+    CACHE_TTL_SECONDS.
+    """
+    if collection_name not in ALLOWED_COLLECTIONS:
+        raise QueryRejected(f"Collection not allowed: {collection_name}")
+    if not isinstance(query_parameters, dict):
+        raise QueryRejected("Filter must be an object.")
+    validate_filter(query_parameters)
+
+    key = normalize_filter(collection_name, query_parameters)
+    with _query_cache_lock:
+        cached = _query_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            _query_cache.move_to_end(key)
+        else:
+            cached = None
+    if cached:
+        logging.info(f"Query cache hit for {collection_name}")
+        return cached[1]
+
+    collection = db[collection_name]
+
+    if collection.estimated_document_count() > LARGE_COLLECTION_THRESHOLD:
+        if uses_collection_scan(collection_name, query_parameters):
+            raise QueryRejected(
+                f"Query on large collection '{collection_name}' is not covered by an index."
+            )
+
+    cursor = (
+        collection.find(query_parameters, DEFAULT_PROJECTION)
+        .limit(QUERY_LIMIT)
+        .max_time_ms(MAX_TIME_MS)
+    )
+    results = list(cursor)
+
+    _store_result(key, results)
+    return results
+
+
+def _store_result(key, results):
+    """Insert into the result cache, purging expired entries and capping its size."""
+    with _query_cache_lock:
+        now = time.monotonic()
+        for stale in [k for k, (expires_at, _) in _query_cache.items() if expires_at <= now]:
+            del _query_cache[stale]
+
+        _query_cache[key] = (now + CACHE_TTL_SECONDS, results)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > CACHE_MAX_ENTRIES:
+            _query_cache.popitem(last=False)
+
+
 def search_database(collection_name: str, query_parameters: Dict[str, Any]):
     """
     Industry Standard Tool: Converts NL to structured queries.
-    Integration point for Phase 1 (users.csv) or Phase 2 (MongoDB).
+    Runs the filter against the MongoDB collection and returns the matching
+    documents (at most QUERY_LIMIT, without _id).
     
     Args:
         collection_name: The name of the database collection (e.g., 'users', 'logs').
@@ -23,11 +198,144 @@ def search_database(collection_name: str, query_parameters: Dict[str, Any]):
         {"department": "IT", "status": "active"}
         {"role": "admin", "last_login": {"$gt": "2023-01-01"}}
     """
+    query_parameters = to_plain(query_parameters)
     print(f"--- [AGENT ACTION] Searching {collection_name} with params: {query_parameters} ---")
-    
-    # In production, this would call your FastAPI endpoint or Mongo driver
-    # Example: return requests.get(f"{API_URL}/search", params=query_parameters).json()
-    return [{"status": "Success", "data": "Found 3 active users in IT"}]
+
+    try:
+        results = run_query(collection_name, query_parameters)
+    except QueryRejected as e:
+        logging.warning(f"Rejected query on {collection_name}: {e}")
+        return [{"status": "Rejected", "error": str(e)}]
+    except (InvalidDocument, TypeError) as e:
+        logging.warning(f"Unencodable filter for {collection_name}: {e}")
+        return [{"status": "Rejected", "error": "Filter could not be encoded as a query."}]
+    except ExecutionTimeout:
+        logging.warning(f"Query on {collection_name} exceeded {MAX_TIME_MS} ms")
+        return [{"status": "Error", "error": f"Query exceeded {MAX_TIME_MS} ms time limit."}]
+    except PyMongoError as e:
+        logging.error(f"MongoDB error on {collection_name}: {e}")
+        return [{"status": "Error", "error": "Database query failed."}]
+
+    # Round-trip through JSON so dates/ObjectIds are safe to hand back to the model
+    rows = json.loads(json.dumps(results, default=str))
+
+    # Remember what the model asked for so ask_agent() can cache it
+    tool_calls = _tool_calls.get()
+    if tool_calls is not None:
+        tool_calls.append((collection_name, query_parameters, rows))
+
+    return rows
+
+
+# ------------------------------------------------------------
+# Semantic cache for NL -> structured query translation
+# ------------------------------------------------------------
+# Repeated questions ("active IT users") are answered from the cached
+# structured query instead of another Gemini round trip. Lookup is exact
+# normalized text first, then embedding similarity above a threshold.
+SEMANTIC_CACHE_SIZE = int(os.getenv("AGENT_SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_TTL = float(os.getenv("AGENT_SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("AGENT_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# Tool calls made by the model during the current ask_agent() request.
+# A ContextVar keeps concurrent requests from seeing each other's calls.
+_tool_calls: contextvars.ContextVar[Optional[List[tuple]]] = contextvars.ContextVar(
+    "tool_calls", default=None
+)
+
+
+def normalize_question(text):
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def cosine_similarity(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+_embedding_model = None
+
+
+def default_embed(text):
+    """Local embedding model (same one used by hybrid_memory_system.py), loaded on first use."""
+    global _embedding_model
+    if _embedding_model is None:
+        from sentence_transformers import SentenceTransformer
+        _embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+    return _embedding_model.encode(text).tolist()
+
+
+class SemanticQueryCache:
+    """
+    LRU + TTL cache mapping questions to (collection_name, query_parameters).
+    Pass a custom embed_fn (e.g. a stub) to run without the embedding model.
+    """
+
+    def __init__(self, embed_fn: Optional[Callable] = None, max_size=SEMANTIC_CACHE_SIZE,
+                 ttl=SEMANTIC_CACHE_TTL, threshold=SEMANTIC_CACHE_THRESHOLD):
+        self.embed_fn = embed_fn or default_embed
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        # normalized question -> (expires_at, embedding, query)
+        self.entries = OrderedDict()
+        # Guards entries; embedding and similarity scoring run outside it
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now):
+        # Caller holds self._lock
+        for key in [k for k, (expires_at, _, _) in self.entries.items() if expires_at <= now]:
+            del self.entries[key]
+
+    def get(self, question):
+        """
+        Return (query, match_type, embedding). On a miss query and match_type
+        are None; the embedding (if one was computed) can be passed to put().
+        """
+        key = normalize_question(question)
+        with self._lock:
+            self._evict_expired(time.monotonic())
+
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][2], "exact", None
+
+            candidates = [(other_key, other_embedding, query)
+                          for other_key, (_, other_embedding, query) in self.entries.items()]
+
+        if not candidates:
+            return None, None, None
+
+        embedding = self.embed_fn(key)
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = cosine_similarity(embedding, candidate[1])
+            if score >= best_score:
+                best, best_score = candidate, score
+
+        if best is None:
+            return None, None, embedding
+
+        with self._lock:
+            if best[0] in self.entries:
+                self.entries.move_to_end(best[0])
+        logging.info(f"Semantic cache match ({best_score:.3f}): '{key}' ~ '{best[0]}'")
+        return best[2], "semantic", embedding
+
+    def put(self, question, query, embedding=None):
+        key = normalize_question(question)
+        if embedding is None:
+            embedding = self.embed_fn(key)
+        with self._lock:
+            self.entries[key] = (time.monotonic() + self.ttl, embedding, query)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+query_cache = SemanticQueryCache()
 
 # Initialize the Generative Model with tools
 model = genai.GenerativeModel('models/gemini-3-flash-preview',
@@ -41,13 +349,83 @@ model = genai.GenerativeModel('models/gemini-3-flash-preview',
 # Start a chat session with automatic function calling enabled
 chat = model.start_chat(enable_automatic_function_calling=True)
 
+
+def new_chat():
+    """A fresh chat session; ChatSession history is not safe to share across threads."""
+    return model.start_chat(enable_automatic_function_calling=True)
+
+
+
+def _is_tool_error(rows):
+    """search_database reports failures as a single status/error entry."""
+    return (
+        len(rows) == 1
+        and rows[0].get("status") in ("Rejected", "Error")
+        and "error" in rows[0]
+    )
+
+
+def ask_agent(question, chat_session=None, cache=None):
+    """
+    Answers a question, reusing a cached structured query when possible.
+
+    Always returns the same shape:
+        answer:      text for the user (Gemini's reply, or a summary on a cache hit)
+        rows:        documents returned by search_database ([] if no lookup ran)
+        query:       {"collection", "filter"} that was run, or None
+        cached:      True when the query came from the cache
+        cache_match: "exact", "semantic" or None
+
+    Without an explicit chat_session each miss gets its own session, so
+    concurrent calls never share chat history.
+    """
+    cache = cache or query_cache
+
+    query, match_type, embedding = cache.get(question)
+    if query is not None:
+        collection_name, query_parameters = query
+        rows = search_database(collection_name, query_parameters)
+        if _is_tool_error(rows):
+            answer, rows = rows[0]["error"], []
+        else:
+            answer = f"Found {len(rows)} matching record(s) in {collection_name}."
+        return {
+            "answer": answer,
+            "rows": rows,
+            "query": {"collection": collection_name, "filter": query_parameters},
+            "cached": True,
+            "cache_match": match_type,
+        }
+
+    chat_session = chat_session or new_chat()
+    token = _tool_calls.set([])
+    try:
+        response = chat_session.send_message(question)
+        tool_calls = _tool_calls.get()
+    finally:
+        _tool_calls.reset(token)
+
+    # Only cache unambiguous translations (exactly one successful tool call)
+    call = tool_calls[0] if len(tool_calls) == 1 else None
+    if call is not None:
+        cache.put(question, call[:2], embedding)
+
+    return {
+        "answer": response.text,
+        "rows": call[2] if call else [],
+        "query": {"collection": call[0], "filter": call[1]} if call else None,
+        "cached": False,
+        "cache_match": None,
+    }
+
+
 # Test execution with Error Handling
 if __name__ == "__main__":
     user_query = "Find all active users in the IT department."
     
     try:
         # [CRITICAL]: Wrapped Agent execution to catch API or Tool errors
-        response = chat.send_message(user_query)
-        print(f"Final Agent Response: {response.text}")
+        result = ask_agent(user_query)
+        print(f"Final Agent Response (cached={result['cached']}): {result['answer']}")
     except Exception as e:
         print(f"CRITICAL ERROR: Agent failed to execute.\nDetails: {e}")
\ No newline at end of file
@@ -1,4 +1,8 @@
+import sys
+import time
 import logging
+import threading
+from array import array
 
 # ------------------------------------------------------------
 # LOGGING CONFIGURATION
@@ -7,97 +11,259 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(levelname)s: %(message)s"
 )
+logger = logging.getLogger(__name__)
+
+# Per-operation messages are DEBUG with lazy %-formatting so that loading
+# large org charts does not pay for string building on every call.
 
 
 class Department:
+    __slots__ = ("name", "_budget", "_members", "_member_info_cache", "_budget_lock", "ledger", "ledger_times")
+
     def __init__(self, name, budget=0):
+        self._setup(name, budget)
+        logger.debug("Department created: %s with budget %s", self.name, self.budget)
+
+    @classmethod
+    def _new(cls, name, budget=0):
+        """Build a Department without logging (used by the bulk loader)."""
+        dept = cls.__new__(cls)
+        dept._setup(name, budget)
+        return dept
+
+    def _setup(self, name, budget):
         self.name = name
-        self.budget = max(budget, 0)
-        self.members = []
-        logging.info(f"Department created: {self.name} with budget {self.budget}")
+        self._budget = max(budget, 0)
+        # dict keyed by User: O(1) add/remove/lookup, keeps insertion order
+        self._members = {}
+        self._member_info_cache = None
+        self._budget_lock = threading.Lock()
+        # Compact budget ledger: signed amounts and their timestamps.
+        # The first entry is the opening balance, so sum(ledger) == budget.
+        self.ledger = array("d")
+        self.ledger_times = array("d")
+        self._record(self._budget)
+
+    @property
+    def budget(self):
+        """Read-only; change it through add_budget/deduct_budget so the ledger stays in sync."""
+        return self._budget
+
+    @property
+    def members(self):
+        """Read-only live view of member Users; use add_member/remove_member to change it."""
+        return self._members.keys()
+
+    def __contains__(self, user):
+        return user in self._members
 
     def add_member(self, user):
         """Adds user to this department while preventing duplicates."""
-        if user in self.members:
-            logging.warning(f"{user.name} is already a member of {self.name}")
+        if user in self._members:
+            logger.warning("%s is already a member of %s", user.name, self.name)
             return f"{user.name} is already a member of {self.name}."
 
-        self.members.append(user)
+        previous = user.department
+        if previous is not None and previous is not self:
+            previous._discard(user)
+
+        self._members[user] = None
+        self._member_info_cache = None
         user.department = self
-        logging.info(f"Added {user.name} to {self.name}")
+        logger.debug("Added %s to %s", user.name, self.name)
         return f"{user.name} added to {self.name} department."
 
+    def remove_member(self, user):
+        """Removes user from this department."""
+        if user not in self._members:
+            logger.warning("%s is not a member of %s", user.name, self.name)
+            return f"{user.name} is not a member of {self.name}."
+
+        self._discard(user)
+        user.department = None
+        logger.debug("Removed %s from %s", user.name, self.name)
+        return f"{user.name} removed from {self.name} department."
+
+    def _discard(self, user):
+        self._members.pop(user, None)
+        self._member_info_cache = None
+
+    def _record(self, amount):
+        self.ledger.append(amount)
+        self.ledger_times.append(time.time())
+
     def add_budget(self, amount):
         """Increase budget with validation."""
         if amount <= 0:
-            logging.error("Attempted to add a non-positive budget amount")
+            logger.error("Attempted to add a non-positive budget amount")
             return "Amount must be positive."
 
-        self.budget += amount
-        logging.info(f"{self.name} budget increased by {amount}. New budget: {self.budget}")
-        return f"Budget updated. New budget: {self.budget}"
+        with self._budget_lock:
+            self._budget += amount
+            self._record(amount)
+            new_budget = self._budget
+        logger.debug("%s budget increased by %s. New budget: %s", self.name, amount, new_budget)
+        return f"Budget updated. New budget: {new_budget}"
 
     def deduct_budget(self, amount):
         """Deduct from budget safely."""
         if amount <= 0:
-            logging.error("Attempted to deduct a non-positive budget amount")
+            logger.error("Attempted to deduct a non-positive budget amount")
             return "Amount must be positive."
 
-        if amount > self.budget:
-            logging.warning(f"{self.name} has insufficient budget for deduction.")
-            return "Not enough budget!"
+        with self._budget_lock:
+            if amount > self._budget:
+                logger.warning("%s has insufficient budget for deduction.", self.name)
+                return "Not enough budget!"
 
-        self.budget -= amount
-        logging.info(f"{self.name} spent {amount}. Remaining: {self.budget}")
-        return f"Amount deducted. Remaining budget: {self.budget}"
+            self._budget -= amount
+            self._record(-amount)
+            remaining = self._budget
+        logger.debug("%s spent %s. Remaining: %s", self.name, amount, remaining)
+        return f"Amount deducted. Remaining budget: {remaining}"
 
     def list_members(self):
-        """Return list of member info."""
-        logging.info(f"Listing members of {self.name}")
-        return [(user.name, user.role, user.level) for user in self.members]
+        """Return list of member info (cached until membership or a member changes)."""
+        logger.debug("Listing members of %s", self.name)
+        if self._member_info_cache is None:
+            self._member_info_cache = [(user.name, user.role, user.level) for user in self._members]
+        return list(self._member_info_cache)
 
 
 class User:
+    __slots__ = ("_name", "_role", "_level", "department")
+
     def __init__(self, name, role, level=1, department=None):
-        self.name = name
-        self.role = role
-        self.level = level
-        self.department = department
-        logging.info(f"User created: {self.name}, role: {self.role}, level: {self.level}")
+        self._name = name
+        self._role = role
+        self._level = level
+        self.department = None
+        logger.debug("User created: %s, role: %s, level: %s", self.name, self.role, self.level)
 
         if department is not None:
             department.add_member(self)
 
+    @classmethod
+    def _new(cls, name, role, level, department):
+        """Build a User already placed in department, without logging (used by the bulk loader)."""
+        user = cls.__new__(cls)
+        user._name = name
+        user._role = role
+        user._level = level
+        user.department = department
+        return user
+
+    def _touch(self):
+        # Member info changed; drop the department's cached listing
+        if self.department is not None:
+            self.department._member_info_cache = None
+
+    # name/role/level are properties so direct assignment also refreshes list_members()
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        self._touch()
+
+    @property
+    def role(self):
+        return self._role
+
+    @role.setter
+    def role(self, value):
+        self._role = value
+        self._touch()
+
+    @property
+    def level(self):
+        return self._level
+
+    @level.setter
+    def level(self, value):
+        self._level = value
+        self._touch()
+
     def promote(self):
         self.level += 1
-        logging.info(f"{self.name} promoted to level {self.level}")
+        logger.debug("%s promoted to level %s", self.name, self.level)
         return f"{self.name} promoted to level {self.level}."
 
     def change_role(self, new_role):
         old_role = self.role
         self.role = new_role
-        logging.info(f"{self.name} changed role from {old_role} → {new_role}")
+        logger.debug("%s changed role from %s → %s", self.name, old_role, new_role)
         return f"{self.name}'s role changed from {old_role} to {new_role}."
 
     def assign_department(self, department):
-        logging.info(f"Assigning {self.name} to {department.name}")
+        logger.debug("Assigning %s to %s", self.name, department.name)
         return department.add_member(self)
 
 
+def load_departments(records, budgets=None):
+    """
+    Bulk loader: builds departments from an iterable of
+    (name, role, level, department_name) rows without per-item logging.
+    Returns a dict of department name -> Department.
+    """
+    budgets = budgets or {}
+    departments = {}
+
+    for name, role, level, dept_name in records:
+        dept = departments.get(dept_name)
+        if dept is None:
+            dept = departments[dept_name] = Department._new(dept_name, budgets.get(dept_name, 0))
+
+        # Fresh users cannot be duplicates, so skip add_member's checks
+        dept._members[User._new(name, role, level, dept)] = None
+
+    logger.info("Bulk loaded %d departments", len(departments))
+    return departments
+
+
+def benchmark(sizes=(1_000, 10_000, 100_000, 500_000)):
+    """Time bulk loading and membership operations at increasing sizes."""
+    for size in sizes:
+        rows = ((f"user{i}", "Staff", 1, f"dept{i % 10}") for i in range(size))
+
+        start = time.perf_counter()
+        departments = load_departments(rows)
+        load_time = time.perf_counter() - start
+
+        dept = departments["dept0"]
+        probe = next(iter(dept._members))
+        start = time.perf_counter()
+        for _ in range(10_000):
+            _ = probe in dept
+            dept.remove_member(probe)
+            dept.add_member(probe)
+        ops_time = (time.perf_counter() - start) / 10_000
+
+        print(f"{size:>8} users | load {load_time:8.3f}s | "
+              f"lookup+remove+add {ops_time * 1e6:6.2f}µs")
+
+
 # ---------------------- TEST MODEL ---------------------- #
 
-cs_dept = Department("Computer Science", 50000)
-mech_dept = Department("Mechanical Engineering", 30000)
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+        sys.exit(0)
+
+    cs_dept = Department("Computer Science", 50000)
+    mech_dept = Department("Mechanical Engineering", 30000)
 
-user1 = User("Ananya", "Student")
-user2 = User("Harshal", "Student", level=2)
+    user1 = User("Ananya", "Student")
+    user2 = User("Harshal", "Student", level=2)
 
-print(user1.assign_department(cs_dept))
-print(user2.assign_department(mech_dept))
+    print(user1.assign_department(cs_dept))
+    print(user2.assign_department(mech_dept))
 
-print(user1.promote())
-print(cs_dept.add_budget(10000))
-print(mech_dept.deduct_budget(5000))
+    print(user1.promote())
+    print(cs_dept.add_budget(10000))
+    print(mech_dept.deduct_budget(5000))
 
-print("CS Dept Members:", cs_dept.list_members())
-print("ME Dept Members:", mech_dept.list_members())
+    print("CS Dept Members:", cs_dept.list_members())
+    print("ME Dept Members:", mech_dept.list_members())
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repo root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Point manager_agent at an in-memory mongomock database with an empty result cache."""
+    mongomock = pytest.importorskip("mongomock")
+    import manager_agent
+
+    database = mongomock.MongoClient()["company_db"]
+    monkeypatch.setattr(manager_agent, "db", database)
+    monkeypatch.setattr(manager_agent, "_query_cache", manager_agent.OrderedDict())
+    return database
@@ -0,0 +1,142 @@
+import manager_agent as agent
+
+
+def test_operator_outside_whitelist_is_rejected(mock_db):
+    mock_db.users.insert_one({"name": "Ananya"})
+
+    for bad_filter in ({"$where": "this.name == 'Ananya'"}, {"$expr": {"$eq": ["$name", "x"]}}):
+        result = agent.search_database("users", bad_filter)
+        assert result[0]["status"] == "Rejected"
+
+
+def test_nested_operator_outside_whitelist_is_rejected(mock_db):
+    result = agent.search_database("users", {"$or": [{"$where": "1"}]})
+    assert result[0]["status"] == "Rejected"
+
+
+def test_collection_outside_allowed_set_is_rejected(mock_db):
+    mock_db.secrets.insert_one({"token": "abc"})
+
+    result = agent.search_database("secrets", {})
+    assert result == [{"status": "Rejected", "error": "Collection not allowed: secrets"}]
+
+
+def test_projection_drops_id(mock_db):
+    mock_db.users.insert_one({"name": "Ananya", "department": "IT"})
+
+    result = agent.search_database("users", {"department": "IT"})
+    assert result == [{"name": "Ananya", "department": "IT"}]
+
+
+def test_query_limit_is_enforced(mock_db, monkeypatch):
+    monkeypatch.setattr(agent, "QUERY_LIMIT", 5)
+    mock_db.users.insert_many([{"name": f"user{i}", "status": "active"} for i in range(20)])
+
+    assert len(agent.search_database("users", {"status": "active"})) == 5
+
+
+def test_collscan_on_large_collection_is_rejected(mock_db, monkeypatch):
+    monkeypatch.setattr(agent, "LARGE_COLLECTION_THRESHOLD", 3)
+    mock_db.users.insert_many([{"name": f"user{i}"} for i in range(5)])
+
+    explain_calls = []
+
+    def fake_command(name, spec, **kwargs):
+        explain_calls.append((name, spec, kwargs))
+        return {"queryPlanner": {"winningPlan": {"stage": "LIMIT", "inputStage": {"stage": "COLLSCAN"}}}}
+
+    monkeypatch.setattr(mock_db, "command", fake_command, raising=False)
+
+    result = agent.search_database("users", {"name": "user1"})
+    assert result[0]["status"] == "Rejected"
+    assert "index" in result[0]["error"]
+
+    name, spec, kwargs = explain_calls[0]
+    assert name == "explain"
+    assert spec["limit"] == agent.QUERY_LIMIT
+    assert kwargs == {"verbosity": "queryPlanner", "maxTimeMS": agent.MAX_TIME_MS}
+
+
+def test_indexed_query_on_large_collection_runs(mock_db, monkeypatch):
+    monkeypatch.setattr(agent, "LARGE_COLLECTION_THRESHOLD", 3)
+    mock_db.users.insert_many([{"name": f"user{i}"} for i in range(5)])
+    monkeypatch.setattr(
+        mock_db, "command",
+        lambda *a, **k: {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}},
+        raising=False,
+    )
+
+    assert agent.search_database("users", {"name": "user1"}) == [{"name": "user1"}]
+
+
+def test_cache_hits_within_ttl_and_misses_after(mock_db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(agent.time, "monotonic", lambda: clock[0])
+    mock_db.users.insert_one({"name": "Ananya", "status": "active"})
+
+    first = agent.run_query("users", {"status": "active"})
+    mock_db.users.insert_one({"name": "Harshal", "status": "active"})
+
+    # Within the TTL the cached rows come back
+    clock[0] += agent.CACHE_TTL_SECONDS - 1
+    assert agent.run_query("users", {"status": "active"}) == first
+
+    # After the TTL the query runs again and sees the new document
+    clock[0] += 2
+    assert len(agent.run_query("users", {"status": "active"})) == 2
+
+
+def test_cache_is_bounded_and_purges_expired(mock_db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(agent.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(agent, "CACHE_MAX_ENTRIES", 3)
+
+    for i in range(5):
+        agent.run_query("users", {"name": f"user{i}"})
+    assert len(agent._query_cache) == 3
+    assert agent.normalize_filter("users", {"name": "user0"}) not in agent._query_cache
+
+    clock[0] += agent.CACHE_TTL_SECONDS + 1
+    agent.run_query("users", {"name": "fresh"})
+    assert list(agent._query_cache) == [agent.normalize_filter("users", {"name": "fresh"})]
+
+
+def _function_call_args(collection_name, query_parameters):
+    """Arguments exactly as Gemini's automatic function calling passes them (proto composites)."""
+    from google.generativeai import protos
+
+    call = protos.FunctionCall(
+        name="search_database",
+        args={"collection_name": collection_name, "query_parameters": query_parameters},
+    )
+    return call.args
+
+
+def test_proto_args_are_checked_against_whitelist(mock_db):
+    result = agent.search_database(**_function_call_args("users", {"$where": "1"}))
+    assert result == [{"status": "Rejected", "error": "Operator not allowed: $where"}]
+
+    nested = agent.search_database(**_function_call_args("users", {"$or": [{"$expr": {}}]}))
+    assert nested[0]["status"] == "Rejected"
+
+
+def test_proto_args_with_lists_run(mock_db):
+    mock_db.users.insert_many([
+        {"name": "Ananya", "status": "active"},
+        {"name": "Harshal", "status": "disabled"},
+    ])
+
+    result = agent.search_database(**_function_call_args("users", {"status": {"$in": ["active", "pending"]}}))
+    assert result == [{"name": "Ananya", "status": "active"}]
+
+
+def test_proto_args_share_cache_key_with_plain_filter(mock_db):
+    agent.search_database(**_function_call_args("users", {"status": "active", "department": "IT"}))
+    agent.search_database("users", {"department": "IT", "status": "active"})
+
+    assert list(agent._query_cache) == [agent.normalize_filter("users", {"status": "active", "department": "IT"})]
+
+
+def test_unencodable_filter_is_rejected(mock_db):
+    result = agent.search_database("users", {"name": object()})
+    assert result[0]["status"] == "Rejected"
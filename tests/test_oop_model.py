@@ -0,0 +1,73 @@
+import pytest
+
+from oop_model import Department, User, load_departments
+
+
+def test_empty_department_is_truthy():
+    assert Department("Empty")
+
+
+def test_members_view_is_read_only():
+    dept = Department("IT")
+    user = User("Ananya", "Intern", department=dept)
+
+    assert user in dept.members
+    with pytest.raises(AttributeError):
+        dept.members.append(User("Harshal", "Intern"))
+
+
+def test_direct_attribute_changes_refresh_list_members():
+    dept = Department("IT")
+    user = User("Ananya", "Intern", department=dept)
+    assert dept.list_members() == [("Ananya", "Intern", 1)]
+
+    user.name = "Ananya G"
+    user.role = "Engineer"
+    user.level = 3
+    assert dept.list_members() == [("Ananya G", "Engineer", 3)]
+
+
+def test_moving_user_removes_from_previous_department():
+    it, hr = Department("IT"), Department("HR")
+    user = User("Ananya", "Intern", department=it)
+
+    hr.add_member(user)
+    assert user not in it and user in hr
+    assert user.department is hr
+
+
+def test_bulk_loader_and_ledger():
+    departments = load_departments(
+        [("a", "Staff", 1, "IT"), ("b", "Staff", 2, "IT"), ("c", "Staff", 1, "HR")],
+        budgets={"IT": 100},
+    )
+    it = departments["IT"]
+    assert len(it.members) == 2
+    assert it.list_members() == [("a", "Staff", 1), ("b", "Staff", 2)]
+
+    it.add_budget(50)
+    it.deduct_budget(30)
+    assert it.budget == 120
+    assert list(it.ledger) == [100.0, 50.0, -30.0]
+    assert sum(it.ledger) == it.budget
+
+
+def test_budget_is_read_only():
+    dept = Department("IT", 500)
+    with pytest.raises(AttributeError):
+        dept.budget = 1_000_000
+    assert list(dept.ledger) == [500.0]
+
+
+def test_bulk_loader_makes_no_per_row_logger_calls(monkeypatch):
+    import oop_model
+
+    calls = []
+    for level in ("debug", "info", "warning"):
+        monkeypatch.setattr(oop_model.logger, level, lambda *a, _level=level, **k: calls.append(_level))
+
+    rows = ((f"user{i}", "Staff", 1, f"dept{i % 3}") for i in range(1_000))
+    departments = load_departments(rows)
+
+    assert sum(len(d.members) for d in departments.values()) == 1_000
+    assert calls == ["info"]
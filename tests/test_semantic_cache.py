@@ -0,0 +1,195 @@
+import pytest
+
+import manager_agent as agent
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChat:
+    """Stands in for a Gemini chat session: 'translates' by calling the tool directly."""
+
+    def __init__(self, collection_name, query_parameters):
+        self.collection_name = collection_name
+        self.query_parameters = query_parameters
+        self.calls = 0
+
+    def send_message(self, question):
+        self.calls += 1
+        rows = agent.search_database(self.collection_name, self.query_parameters)
+        return FakeResponse(f"There are {len(rows)} results.")
+
+
+class FakeEmbedder:
+    """Maps words to fixed vectors so similarity is predictable."""
+
+    VECTORS = {
+        "it": [1.0, 0.0, 0.0],
+        "engineering": [0.9, 0.1, 0.0],
+        "hr": [0.0, 1.0, 0.0],
+        "finance": [0.0, 0.0, 1.0],
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        vector = [0.0, 0.0, 0.0]
+        for word in text.split():
+            for i, value in enumerate(self.VECTORS.get(word, [0.0, 0.0, 0.0])):
+                vector[i] += value
+        return vector
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(agent.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def users(mock_db):
+    mock_db.users.insert_many([
+        {"name": "Ananya", "department": "IT", "status": "active"},
+        {"name": "Harshal", "department": "HR", "status": "active"},
+    ])
+    return mock_db.users
+
+
+def test_miss_then_exact_hit(users):
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder())
+    chat = FakeChat("users", {"department": "IT", "status": "active"})
+
+    first = agent.ask_agent("Active IT users?", chat, cache)
+    assert first["cached"] is False and first["cache_match"] is None
+    assert first["answer"] == "There are 1 results."
+    assert first["rows"] == [{"name": "Ananya", "department": "IT", "status": "active"}]
+    assert first["query"] == {"collection": "users", "filter": {"department": "IT", "status": "active"}}
+
+    second = agent.ask_agent("  active it USERS ", chat, cache)
+    assert second["cached"] is True and second["cache_match"] == "exact"
+    assert second["rows"] == first["rows"]
+    assert second["query"] == first["query"]
+    assert isinstance(second["answer"], str)
+    assert chat.calls == 1
+
+
+def test_semantic_hit_above_threshold_and_miss_below(users):
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder(), threshold=0.9)
+    chat = FakeChat("users", {"department": "IT"})
+    agent.ask_agent("it users", chat, cache)
+
+    hit = agent.ask_agent("engineering users", chat, cache)
+    assert hit["cached"] is True and hit["cache_match"] == "semantic"
+    assert chat.calls == 1
+
+    miss = agent.ask_agent("hr users", chat, cache)
+    assert miss["cached"] is False
+    assert chat.calls == 2
+
+
+def test_miss_embeds_question_once(users):
+    embedder = FakeEmbedder()
+    cache = agent.SemanticQueryCache(embed_fn=embedder)
+    cache.put("hr users", ("users", {"department": "HR"}))
+    embedder.calls = 0
+
+    agent.ask_agent("finance users", FakeChat("users", {"department": "Finance"}), cache)
+    assert embedder.calls == 1
+
+
+def test_lru_eviction_at_max_size(clock):
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder(), max_size=2)
+    cache.put("it", ("users", {"department": "IT"}))
+    cache.put("hr", ("users", {"department": "HR"}))
+
+    # Touch "it" so "hr" becomes least recently used
+    assert cache.get("it")[1] == "exact"
+    cache.put("finance", ("users", {"department": "Finance"}))
+
+    assert list(cache.entries) == ["it", "finance"]
+
+
+def test_ttl_expiry(clock):
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder(), ttl=60)
+    cache.put("it users", ("users", {"department": "IT"}))
+
+    clock[0] += 59
+    assert cache.get("it users")[1] == "exact"
+
+    clock[0] += 2
+    assert cache.get("it users")[0] is None
+    assert not cache.entries
+
+
+def test_failed_lookup_is_not_cached(mock_db):
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder())
+    chat = FakeChat("users", {"$where": "1"})
+
+    result = agent.ask_agent("it users", chat, cache)
+    assert result["cached"] is False
+    assert result["rows"] == [] and result["query"] is None
+    assert not cache.entries
+
+
+def test_tool_calls_outside_ask_agent_are_not_recorded(mock_db):
+    agent.search_database("users", {})
+    assert agent._tool_calls.get() is None
+
+
+class ProtoChat(FakeChat):
+    """Calls the tool the way automatic function calling does: with proto FunctionCall args."""
+
+    def send_message(self, question):
+        from google.generativeai import protos
+
+        self.calls += 1
+        call = protos.FunctionCall(
+            name="search_database",
+            args={"collection_name": self.collection_name, "query_parameters": self.query_parameters},
+        )
+        rows = agent.search_database(**call.args)
+        return FakeResponse(f"There are {len(rows)} results.")
+
+
+def test_proto_tool_call_is_cached_as_plain_filter(users):
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder())
+    chat = ProtoChat("users", {"department": {"$in": ["IT", "HR"]}})
+
+    first = agent.ask_agent("it users", chat, cache)
+    assert first["query"]["filter"] == {"department": {"$in": ["IT", "HR"]}}
+    assert type(first["query"]["filter"]) is dict
+
+    second = agent.ask_agent("it users", chat, cache)
+    assert second["cached"] is True
+    assert len(second["rows"]) == 2
+    assert chat.calls == 1
+
+
+def test_concurrent_puts_and_gets(clock):
+    import threading
+
+    cache = agent.SemanticQueryCache(embed_fn=FakeEmbedder(), max_size=8)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(300):
+                cache.put(f"q{n} {i}", ("users", {"i": i}), embedding=[1.0, float(i), 0.0])
+                cache.get(f"q{n} {i - 1}")
+                cache.get("it users")
+        except Exception as e:  # pragma: no cover - only on failure
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(cache.entries) <= 8